@@ -17,262 +17,374 @@ Author: MuleSoft Financial Services Team
 Version: 1.0.0
 """
 
-import socket
-import threading
+import asyncio
 import re
 import logging
+import socket
 import argparse
+import itertools
 import json
-from datetime import datetime
+import multiprocessing
+import queue
+import time
+from collections import deque
+from dataclasses import dataclass
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, List, Optional, Tuple
 
-# Configure logging
+# uvloop is optional: when installed it replaces the default selector event
+# loop with a libuv-based one (io_uring-backed where the kernel supports it),
+# cutting per-message syscall overhead. The server runs fine without it.
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# orjson is optional too: a C serializer that is several times faster than
+# stdlib json and encodes datetime natively, returning bytes directly
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Configure logging. The event loop only enqueues records (no I/O); a
+# QueueListener thread does the actual file/stream writes in the background.
+_log_queue = queue.SimpleQueue()
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('swift_mock_server.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(_log_queue)]
+)
+_log_listener = QueueListener(
+    _log_queue,
+    logging.FileHandler('swift_mock_server.log'),
+    logging.StreamHandler()
 )
+_log_listener.start()
 logger = logging.getLogger('SWIFT-Mock-Server')
 
+# Precompiled field-tag pattern - compiled once at import, not per message
+_TAG_RE = re.compile(rb':(\d+[A-Z]?):')
+
+# Mandatory MT103 fields
+_REQUIRED_FIELDS = frozenset(('20', '32A', '50K', '59'))
+
+# Evaluated once: INFO can only be widened (to DEBUG) by --debug, never
+# disabled, so a module-level snapshot is safe and skips the per-message
+# isEnabledFor walk
+_INFO_ENABLED = logger.isEnabledFor(logging.INFO)
+
+# Static parts of the ACK/NACK frames, encoded once at import; responses
+# are assembled with a single bytes.join around the variable fields
+_ACK_HDR = b'{1:F21MOCKSVRXXXXAXXX0000000000}{2:I901MOCKRCVRXXXXN}{4:\n:20:'
+_ACK_TAIL = b'\n:77E:ACK\n-}'
+_NACK_HDR = _ACK_HDR
+_NACK_MID = b'\n:77E:NACK\n:79:'
+_NACK_TAIL = b'\n-}'
+
+# Timestamp cache: strftime only runs on second rollover, every message in
+# the same wall-clock second just appends the microsecond tail
+_TS_CACHE = [0, '']
+
+
+def _iso_ts() -> str:
+    """ISO-8601 local timestamp, equivalent to datetime.now().isoformat()"""
+    ns = time.time_ns()
+    sec = ns // 1_000_000_000
+    if sec != _TS_CACHE[0]:
+        _TS_CACHE[0] = sec
+        _TS_CACHE[1] = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(sec))
+    return f"{_TS_CACHE[1]}.{ns % 1_000_000_000 // 1000:06d}"
+
 
 class SwiftMessage:
     """Represents a parsed SWIFT message"""
-    
-    def __init__(self, raw_message: str):
+
+    def __init__(self, raw_message: bytes):
         self.raw = raw_message
         self.blocks = self._parse_blocks()
         self.fields = self._parse_fields()
         self.is_valid = self._validate()
-        
-    def _parse_blocks(self) -> Dict[str, str]:
+
+    def _parse_blocks(self) -> Dict[str, bytes]:
         """Parse SWIFT message blocks {1:...} {2:...} {4:...}"""
+        # Hand-rolled scan instead of regex: bytes.find runs as a C memchr
+        # loop, so no Python bytecode executes between block boundaries
         blocks = {}
-        block_pattern = r'\{(\d):(.*?)\}'
-        matches = re.finditer(block_pattern, self.raw, re.DOTALL)
-        
-        for match in matches:
-            block_num = match.group(1)
-            block_content = match.group(2)
-            blocks[f'block{block_num}'] = block_content
-            
+        raw = self.raw
+        pos = raw.find(b'{')
+
+        while pos != -1:
+            num = raw[pos + 1:pos + 2]
+            if num.isdigit() and raw[pos + 2:pos + 3] == b':':
+                end = raw.find(b'}', pos + 3)
+                if end == -1:
+                    break
+                blocks[f'block{num.decode("ascii")}'] = raw[pos + 3:end]
+                pos = raw.find(b'{', end + 1)
+            else:
+                pos = raw.find(b'{', pos + 1)
+
         return blocks
-    
-    def _parse_fields(self) -> Dict[str, str]:
+
+    def _parse_fields(self) -> Dict[str, bytes]:
         """Parse SWIFT fields like :20:, :32A:, etc."""
         fields = {}
-        
+
         # Extract block 4 (message content)
-        block4 = self.blocks.get('block4', '')
-        
-        # Parse fields using pattern :TAG:VALUE
-        field_pattern = r':(\d+[A-Z]?):(.*?)(?=:\d+[A-Z]?:|$)'
-        matches = re.finditer(field_pattern, block4, re.DOTALL)
-        
-        for match in matches:
-            tag = match.group(1)
-            value = match.group(2).strip()
-            fields[tag] = value
-            
+        block4 = self.blocks.get('block4', b'')
+
+        # Single pass: locate every :TAG: marker, then slice the value out
+        # between consecutive markers (no backtracking lookahead)
+        starts = [(m.group(1).decode('ascii'), m.start(), m.end())
+                  for m in _TAG_RE.finditer(block4)]
+
+        for i, (tag, _, value_start) in enumerate(starts):
+            value_end = starts[i + 1][1] if i + 1 < len(starts) else len(block4)
+            fields[tag] = block4[value_start:value_end].strip()
+
         return fields
-    
+
     def _validate(self) -> bool:
         """Validate MT103 message structure"""
-        required_fields = ['20', '32A', '50K', '59']
-        
-        for field in required_fields:
-            if field not in self.fields:
-                logger.warning(f"Missing required field: {field}")
-                return False
-                
+        missing = _REQUIRED_FIELDS.difference(self.fields)
+        if missing:
+            logger.warning("Missing required fields: %s", sorted(missing))
+            return False
+
         return True
-    
-    def get_field(self, tag: str) -> Optional[str]:
+
+    def get_field(self, tag: str) -> Optional[bytes]:
         """Get field value by tag"""
         return self.fields.get(tag)
-    
+
     def to_dict(self) -> Dict:
         """Convert message to dictionary for logging"""
+        # Field values stay as bytes during parsing; decode only here,
+        # where a human-readable audit entry is built
+        fields = {tag: value.decode('utf-8', errors='replace')
+                  for tag, value in self.fields.items()}
         return {
-            'reference': self.get_field('20'),
-            'value_date_amount': self.get_field('32A'),
-            'ordering_customer': self.get_field('50K'),
-            'beneficiary': self.get_field('59'),
+            'reference': fields.get('20'),
+            'value_date_amount': fields.get('32A'),
+            'ordering_customer': fields.get('50K'),
+            'beneficiary': fields.get('59'),
             'is_valid': self.is_valid,
-            'fields': self.fields
+            'fields': fields
         }
 
 
+@dataclass(slots=True)
+class Session:
+    """Per-connection bookkeeping; slotted, so roughly half a dict's size"""
+    address: Tuple
+    connected_at: float
+    messages_received: int = 0
+
+
+# Atomic under the GIL, so session ids are race-free and O(1) to mint
+_SESSION_IDS = itertools.count(1)
+
+
 class SwiftMockServer:
     """SWIFT Mock Server - Simulates bank back-office system"""
-    
-    def __init__(self, host: str = '0.0.0.0', port: int = 10103):
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 10103, reuse_port: bool = False):
         self.host = host
         self.port = port
-        self.server_socket = None
+        self.reuse_port = reuse_port
+        self.server = None
         self.is_running = False
         self.message_count = 0
         self.sessions = {}
-        
+        # Closed-session summaries for post-run stats; bounded so a
+        # long-lived server cannot grow without limit
+        self.closed_sessions = deque(maxlen=1024)
+        self._txn_log = None
+
     def start(self):
         """Start the SWIFT mock server"""
-        self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        
         try:
-            self.server_socket.bind((self.host, self.port))
-            self.server_socket.listen(5)
-            self.is_running = True
-            
-            logger.info(f"🚀 SWIFT Mock Server started on {self.host}:{self.port}")
-            logger.info(f"📡 Ready to receive MT103 messages...")
-            logger.info(f"💡 Press Ctrl+C to stop")
-            
-            while self.is_running:
-                try:
-                    client_socket, client_address = self.server_socket.accept()
-                    logger.info(f"✅ New connection from {client_address}")
-                    
-                    # Handle client in separate thread
-                    client_thread = threading.Thread(
-                        target=self._handle_client,
-                        args=(client_socket, client_address)
-                    )
-                    client_thread.daemon = True
-                    client_thread.start()
-                    
-                except KeyboardInterrupt:
-                    logger.info("\n🛑 Server shutdown requested")
-                    break
-                except Exception as e:
-                    logger.error(f"Error accepting connection: {e}")
-                    
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            logger.info("\n🛑 Server shutdown requested")
         finally:
             self.stop()
-    
+
+    async def _serve(self):
+        """Run the asyncio server; one event loop multiplexes all clients"""
+        self.server = await asyncio.start_server(
+            self._handle_client, self.host, self.port, backlog=1024,
+            reuse_port=self.reuse_port or None
+        )
+        # One long-lived, buffered handle instead of open/close per message;
+        # the single event-loop thread is the only writer
+        self._txn_log = open('swift_transactions.log', 'ab', buffering=1 << 16)
+        self.is_running = True
+
+        logger.info(f"🚀 SWIFT Mock Server started on {self.host}:{self.port}")
+        logger.info(f"📡 Ready to receive MT103 messages...")
+        logger.info(f"💡 Press Ctrl+C to stop")
+
+        async with self.server:
+            await self.server.serve_forever()
+
     def stop(self):
         """Stop the server"""
         self.is_running = False
-        if self.server_socket:
-            self.server_socket.close()
+        if self.server:
+            self.server.close()
+            self.server = None
+        if self._txn_log:
+            self._txn_log.close()
+            self._txn_log = None
         logger.info("👋 SWIFT Mock Server stopped")
-    
-    def _handle_client(self, client_socket: socket.socket, client_address: Tuple):
+        # Drain any queued records before the process exits
+        if _log_listener._thread is not None:
+            _log_listener.stop()
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
         """Handle client connection"""
-        session_id = f"SESSION-{len(self.sessions) + 1}"
-        self.sessions[session_id] = {
-            'address': client_address,
-            'connected_at': datetime.now().isoformat(),
-            'messages_received': 0
-        }
-        
-        logger.info(f"📋 Session created: {session_id}")
-        
+        client_address = writer.get_extra_info('peername')
+        logger.info("✅ New connection from %s", client_address)
+
+        # Tune the accepted socket: disable Nagle so the small ACK/NACK
+        # frames go out immediately, and widen the kernel buffers so several
+        # MT103s can queue between reads
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+
+        session_id = next(_SESSION_IDS)
+        self.sessions[session_id] = Session(client_address, time.time())
+
+        logger.info("📋 Session created: SESSION-%d", session_id)
+
         try:
             # Send welcome/authentication response
-            self._send_auth_response(client_socket, session_id)
-            
-            buffer = ""
+            await self._send_auth_response(writer, session_id)
+
+            buffer = bytearray()
+            scan_from = 0
             while self.is_running:
-                data = client_socket.recv(4096)
-                
+                data = await reader.read(65536)
+
                 if not data:
-                    logger.info(f"🔌 Client {client_address} disconnected")
+                    logger.info("🔌 Client %s disconnected", client_address)
                     break
-                
-                buffer += data.decode('utf-8', errors='ignore')
-                
-                # Check if we have a complete SWIFT message
-                if self._is_complete_message(buffer):
-                    self._process_message(client_socket, buffer, session_id)
-                    buffer = ""
-                    
+
+                buffer.extend(data)
+
+                # Frame on the literal block-4 terminator '-}'. scan_from
+                # remembers how far we already searched so each byte is
+                # scanned once, no matter how many recvs a message spans.
+                while True:
+                    idx = buffer.find(b'-}', scan_from)
+                    if idx == -1:
+                        # '-}' may straddle the next read; keep the last byte
+                        scan_from = max(0, len(buffer) - 1)
+                        break
+
+                    message = bytes(buffer[:idx + 2])
+                    # In-place prefix reclaim; no new bytearray per message
+                    del buffer[:idx + 2]
+                    scan_from = 0
+                    await self._process_message(writer, message, session_id)
+
         except Exception as e:
-            logger.error(f"Error handling client {client_address}: {e}")
+            logger.error("Error handling client %s: %s", client_address, e)
         finally:
-            client_socket.close()
-            logger.info(f"Session {session_id} closed")
-    
-    def _send_auth_response(self, client_socket: socket.socket, session_id: str):
+            writer.close()
+            # Drop the live entry so the map only holds connected clients
+            session = self.sessions.pop(session_id, None)
+            if session is not None:
+                self.closed_sessions.append(session)
+            logger.info("Session SESSION-%d closed", session_id)
+
+    async def _send_auth_response(self, writer: asyncio.StreamWriter, session_id: int):
         """Send authentication response"""
-        auth_response = f"AUTH_OK:SWIFT_MOCK_SERVER:{session_id}\n"
-        client_socket.send(auth_response.encode('utf-8'))
-        logger.info(f"✉️  Sent authentication response for {session_id}")
-    
-    def _is_complete_message(self, buffer: str) -> bool:
-        """Check if buffer contains complete SWIFT message"""
-        return ('{1:' in buffer and 
-                '{2:' in buffer and 
-                '{4:' in buffer and 
-                ('-}' in buffer or buffer.count('}') >= 3))
-    
-    def _process_message(self, client_socket: socket.socket, message: str, session_id: str):
+        auth_response = f"AUTH_OK:SWIFT_MOCK_SERVER:SESSION-{session_id}\n"
+        writer.write(auth_response.encode('utf-8'))
+        await writer.drain()
+        logger.info("✉️  Sent authentication response for SESSION-%d", session_id)
+
+    async def _process_message(self, writer: asyncio.StreamWriter, message: bytes, session_id: int):
         """Process received SWIFT message"""
         self.message_count += 1
         msg_id = f"MSG-{self.message_count:06d}"
-        
-        logger.info(f"📨 Received message {msg_id} in session {session_id}")
-        logger.debug(f"Raw message:\n{message}")
-        
+
+        logger.debug("Raw message:\n%s", message)
+
         try:
             # Parse SWIFT message
             swift_msg = SwiftMessage(message)
-            
-            logger.info(f"🔍 Parsed MT103 message:")
-            logger.info(f"   Reference: {swift_msg.get_field('20')}")
-            logger.info(f"   Value/Amount: {swift_msg.get_field('32A')}")
-            logger.info(f"   Ordering Customer: {swift_msg.get_field('50K')}")
-            logger.info(f"   Beneficiary: {swift_msg.get_field('59')}")
-            
+
+            # One record per message instead of five; %-style args are only
+            # formatted when the record is actually emitted
+            if _INFO_ENABLED:
+                get = swift_msg.fields.get
+                logger.info(
+                    "📨 %s (SESSION-%d) 🔍 ref=%s amount=%s ordering=%s beneficiary=%s",
+                    msg_id, session_id,
+                    (get('20') or b'').decode('utf-8', 'replace'),
+                    (get('32A') or b'').decode('utf-8', 'replace'),
+                    (get('50K') or b'').decode('utf-8', 'replace'),
+                    (get('59') or b'').decode('utf-8', 'replace')
+                )
+
             # Validate and send response
             if swift_msg.is_valid:
-                self._send_ack(client_socket, msg_id, swift_msg)
-                self.sessions[session_id]['messages_received'] += 1
+                await self._send_ack(writer, msg_id, swift_msg)
+                self.sessions[session_id].messages_received += 1
             else:
-                self._send_nack(client_socket, msg_id, "Invalid message structure")
-                
+                await self._send_nack(writer, msg_id, "Invalid message structure")
+
             # Log transaction
             self._log_transaction(msg_id, session_id, swift_msg)
-            
+
         except Exception as e:
-            logger.error(f"Error processing message: {e}")
-            self._send_nack(client_socket, msg_id, str(e))
-    
-    def _send_ack(self, client_socket: socket.socket, msg_id: str, swift_msg: SwiftMessage):
+            logger.error("Error processing message: %s", e)
+            await self._send_nack(writer, msg_id, str(e))
+
+    async def _send_ack(self, writer: asyncio.StreamWriter, msg_id: str, swift_msg: SwiftMessage):
         """Send ACK (F21 - Positive Acknowledgment)"""
-        reference = swift_msg.get_field('20') or msg_id
-        
-        # Simplified ACK format
-        ack = f"{{1:F21MOCKSVRXXXXAXXX0000000000}}"
-        ack += f"{{2:I901MOCKRCVRXXXXN}}"
-        ack += f"{{4:\n:20:{reference}\n:77E:ACK\n-}}"
-        
-        client_socket.send(ack.encode('utf-8'))
-        logger.info(f"✅ Sent ACK for message {msg_id}")
-    
-    def _send_nack(self, client_socket: socket.socket, msg_id: str, reason: str):
+        reference = swift_msg.get_field('20') or msg_id.encode('ascii')
+
+        # Simplified ACK format: hand the fragments straight to the
+        # transport (scatter-gather); no joined copy is built Python-side
+        writer.writelines((_ACK_HDR, reference, _ACK_TAIL))
+        await writer.drain()
+        logger.info("✅ Sent ACK for message %s", msg_id)
+
+    async def _send_nack(self, writer: asyncio.StreamWriter, msg_id: str, reason: str):
         """Send NACK (Negative Acknowledgment)"""
-        
-        nack = f"{{1:F21MOCKSVRXXXXAXXX0000000000}}"
-        nack += f"{{2:I901MOCKRCVRXXXXN}}"
-        nack += f"{{4:\n:20:{msg_id}\n:77E:NACK\n:79:{reason}\n-}}"
-        
-        client_socket.send(nack.encode('utf-8'))
-        logger.warning(f"❌ Sent NACK for message {msg_id}: {reason}")
-    
-    def _log_transaction(self, msg_id: str, session_id: str, swift_msg: SwiftMessage):
+
+        writer.writelines((
+            _NACK_HDR, msg_id.encode('ascii'),
+            _NACK_MID, reason.encode('utf-8', errors='replace'),
+            _NACK_TAIL
+        ))
+        await writer.drain()
+        logger.warning("❌ Sent NACK for message %s: %s", msg_id, reason)
+
+    def _log_transaction(self, msg_id: str, session_id: int, swift_msg: SwiftMessage):
         """Log transaction to file"""
         transaction = {
             'message_id': msg_id,
-            'session_id': session_id,
-            'timestamp': datetime.now().isoformat(),
+            'session_id': f'SESSION-{session_id}',
+            'timestamp': _iso_ts(),
             'message_details': swift_msg.to_dict()
         }
-        
-        with open('swift_transactions.log', 'a') as f:
-            f.write(json.dumps(transaction) + '\n')
+
+        if orjson is not None:
+            self._txn_log.write(orjson.dumps(transaction, option=orjson.OPT_APPEND_NEWLINE))
+        else:
+            self._txn_log.write(json.dumps(transaction).encode('utf-8') + b'\n')
+        # Flush periodically so a crash loses at most ~100 entries
+        if self.message_count % 100 == 0:
+            self._txn_log.flush()
 
 
 def main():
@@ -281,32 +393,54 @@ def main():
         description='SWIFT MT103 Mock Server',
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
-    
+
     parser.add_argument('--host', default='0.0.0.0', help='Host to bind to')
     parser.add_argument('--port', type=int, default=10103, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes sharing the port via SO_REUSEPORT')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
-    
+
     args = parser.parse_args()
-    
+
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
-    
+
     print("""
 ╔═══════════════════════════════════════════════════════════╗
 ║         SWIFT MT103 Mock Server v1.0.0                    ║
 ║         Simulating Bank Back-Office System                ║
 ╚═══════════════════════════════════════════════════════════╝
     """)
-    
-    server = SwiftMockServer(host=args.host, port=args.port)
-    
-    try:
+
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        logger.info("⚡ uvloop event loop policy installed")
+
+    if args.workers > 1:
+        # Prefork: each worker binds its own SO_REUSEPORT listen socket and
+        # the kernel load-balances connections across them, so the CPU-bound
+        # parse/serialize work scales past one GIL. Workers keep independent
+        # counters and session maps - connections never migrate between them.
+        ctx = multiprocessing.get_context('spawn')
+        workers = [
+            ctx.Process(
+                target=SwiftMockServer(host=args.host, port=args.port, reuse_port=True).start,
+                name=f'swift-worker-{i + 1}'
+            )
+            for i in range(args.workers)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+    else:
+        server = SwiftMockServer(host=args.host, port=args.port)
         server.start()
-    except KeyboardInterrupt:
-        logger.info("\n🛑 Shutting down gracefully...")
-        server.stop()
 
 
 if __name__ == '__main__':
     main()
-
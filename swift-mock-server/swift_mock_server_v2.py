@@ -13,15 +13,33 @@ Features:
 """
 
 import socket
+import selectors
 import threading
+import logging
 import re
 import datetime
 import time
 import json
 import hashlib
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from typing import Dict, Optional, List
+from collections import deque
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Deque, Dict, Optional, List
+
+# orjson is optional: C-level serializer, several times faster than stdlib
+# json for the dict-of-dict payloads here, returning bytes directly
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS, default=str)
+else:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, default=str, separators=(',', ':')).encode('utf-8')
 
 # Configuration
 HOST = '127.0.0.1'
@@ -29,15 +47,90 @@ PORT = 10103
 CONTROL_API_PORT = 8888
 STATE_FILE = '/tmp/swift_mock_state.json'
 
+# Hot-path tracing goes through logging, not print: per-frame dumps are
+# DEBUG (free when disabled), state changes are INFO. print() would grab
+# the stdout lock and flush per line for every frame.
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+log = logging.getLogger("swift_mock")
+
+# Parsing patterns, compiled once at import instead of per message.
+# SWIFT frames are ASCII, so these run on bytes: no UTF-8 decode of the
+# full message is needed before parsing.
+_BLOCK4_RE = re.compile(rb'\{4:(.*?)-\}', re.DOTALL)
+_BLOCK5_RE = re.compile(rb'\{5:(.+?)\}\}$', re.DOTALL)
+_TAG20_RE = re.compile(rb':20:(\S+)')
+_TAG32A_RE = re.compile(rb':32A:(\d{6})(\w{3})([\d,\.]+)')
+_TAG34_RE = re.compile(rb':34:(\d+)')
+_TAG50K_RE = re.compile(rb':50K:([^:]+)')
+_TAG59_RE = re.compile(rb':59:([^:]+)')
+_MAC_RE = re.compile(rb'\{MAC:([A-F0-9]+)\}')
+_CHK_RE = re.compile(rb'\{CHK:([A-F0-9]+)\}')
+_TRAILER_RE = re.compile(rb'\{5:\{MAC:([A-F0-9]+)\}\{CHK:([A-F0-9]+)\}\}', re.DOTALL)
+_TRAILER_STRIP_RE = re.compile(rb'\{5:.*?\}\}$', re.DOTALL)
+# Framing: a complete Block 5 trailer directly after the block-4 '-}'
+_TRAILER_AFTER_RE = re.compile(rb'\s*\{5:.*?\}\}', re.DOTALL)
+
 # Global state
 class MockServerState:
     def __init__(self):
         self.sessions: Dict[str, Dict] = {}
         self.error_mode: Optional[str] = None  # 'nack_next', 'drop_connection', 'ignore_sequence', 'invalid_mac'
-        self.ignored_sequences: List[int] = []
-        self.message_log: List[Dict] = []
-        self.lock = threading.Lock()
+        # Set, not list: the per-message membership test is O(1)
+        self.ignored_sequences: set = set()
+        # Bounded ring: O(1) append with the cap enforced by the deque,
+        # no per-message list reslice once 1000 entries are reached
+        self.message_log: Deque[Dict] = deque(maxlen=1000)
+        # Split locks: session bookkeeping and the audit log are touched by
+        # different paths, so one global lock would serialise all clients
+        # behind every multi-KB state dump
+        self._sessions_lock = threading.Lock()
+        self._log_lock = threading.Lock()
         self.load_state()
+        # Debounced persistence: writers flip a dirty flag and a daemon
+        # thread flushes at most every ~250ms, instead of serialising the
+        # whole state to /tmp on every single message
+        self._dirty = threading.Event()
+        self._status_cache: Optional[bytes] = None
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+    
+    def mark_dirty(self):
+        """Request an eventual save_state from the flusher thread"""
+        self._status_cache = None
+        self._dirty.set()
+    
+    def status_payload(self) -> bytes:
+        """JSON bytes for /status; re-encoded only after state changes"""
+        cached = self._status_cache
+        if cached is not None:
+            return cached
+        with self._sessions_lock:
+            session_details = {
+                sid: {
+                    'input_seq': s['input_seq'],
+                    'output_seq': s['output_seq'],
+                    'connected': s['connected']
+                }
+                for sid, s in self.sessions.items()
+            }
+            session_count = len(self.sessions)
+        payload = _dumps({
+            'status': 'running',
+            'sessions': session_count,
+            'error_mode': self.error_mode,
+            'ignored_sequences': sorted(self.ignored_sequences),
+            'message_count': len(self.message_log),
+            'session_details': session_details
+        })
+        self._status_cache = payload
+        return payload
+    
+    def _flush_loop(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(0.25)  # coalesce bursts into one write
+            self._dirty.clear()
+            self.save_state()
     
     def load_state(self):
         """Load persisted state from file"""
@@ -46,7 +139,7 @@ class MockServerState:
                 with open(STATE_FILE, 'r') as f:
                     data = json.load(f)
                     self.sessions = data.get('sessions', {})
-                    self.message_log = data.get('message_log', [])
+                    self.message_log = deque(data.get('message_log', []), maxlen=1000)
                     print(f"✓ Loaded state: {len(self.sessions)} sessions, {len(self.message_log)} messages")
             except Exception as e:
                 print(f"⚠ Failed to load state: {e}")
@@ -54,17 +147,27 @@ class MockServerState:
     def save_state(self):
         """Persist state to file for crash recovery"""
         try:
-            with open(STATE_FILE, 'w') as f:
-                json.dump({
-                    'sessions': self.sessions,
-                    'message_log': self.message_log[-1000:]  # Keep last 1000 messages
-                }, f, indent=2, default=str)
+            # Snapshot under the locks, then serialise and write with no
+            # lock held so clients never wait behind the JSON encode or I/O
+            with self._sessions_lock:
+                sessions_snapshot = dict(self.sessions)
+            with self._log_lock:
+                log_snapshot = list(self.message_log)  # capped at 1000 by maxlen
+            # One serialized payload, one write: json.dump would issue a
+            # separate f.write per token, and the pretty indent only bloats
+            # a runtime state file nobody reads
+            payload = _dumps({
+                'sessions': sessions_snapshot,
+                'message_log': log_snapshot
+            })
+            with open(STATE_FILE, 'wb') as f:
+                f.write(payload)
         except Exception as e:
             print(f"⚠ Failed to save state: {e}")
     
     def get_session(self, session_id: str) -> Dict:
         """Get or create session"""
-        with self.lock:
+        with self._sessions_lock:
             if session_id not in self.sessions:
                 self.sessions[session_id] = {
                     'session_id': session_id,
@@ -74,67 +177,123 @@ class MockServerState:
                     'last_heartbeat': datetime.datetime.now(),
                     'created_at': datetime.datetime.now()
                 }
-                self.save_state()
+                self.mark_dirty()
             return self.sessions[session_id]
     
-    def log_message(self, session_id: str, direction: str, message: str, details: Dict):
+    def log_message(self, session_id: str, direction: str, message: str, details: Dict,
+                    now: Optional[datetime.datetime] = None):
         """Log message for audit trail"""
-        with self.lock:
+        if isinstance(message, bytes):
+            message = message.decode('utf-8', errors='replace')
+        with self._log_lock:
             entry = {
-                'timestamp': datetime.datetime.now().isoformat(),
+                'timestamp': (now or datetime.datetime.now()).isoformat(),
                 'session_id': session_id,
                 'direction': direction,  # 'INBOUND' or 'OUTBOUND'
                 'message_preview': message[:200] if message else None,
                 'details': details
             }
             self.message_log.append(entry)
-            # Keep only last 1000 messages in memory
-            if len(self.message_log) > 1000:
-                self.message_log = self.message_log[-1000:]
-            self.save_state()
+            self.mark_dirty()
 
 state = MockServerState()
 
 
-def calculate_swift_checksum(message: str) -> str:
+@lru_cache(maxsize=2048)
+def _sha256_hex12(data: bytes) -> str:
+    """SHA-256 prefix used for CHK; cached so repeated frames skip the hash"""
+    return hashlib.sha256(data).hexdigest()[:12].upper()
+
+
+_MAC_KEY = b"MOCK_SECRET_KEY"
+
+# Static response prefixes, encoded once at import. SHA-256 is
+# Merkle-Damgard, so the hash state over each constant header is also
+# precomputed once and copied per outgoing frame - only the variable
+# tail ever gets hashed at runtime.
+_ACK_HEADER = b"{1:F21MOCKSVRXXXXAXXX0000000000}{2:I901MOCKRCVRXXXXN}{4:\n"
+_RESEND_HEADER = b"{1:F02MOCKSVRXXXXAXXX0000000000}{2:I2MOCKRCVRXXXXN}{4:\n"
+_ACK_PREFIX_HASH = hashlib.sha256(_ACK_HEADER)
+_RESEND_PREFIX_HASH = hashlib.sha256(_RESEND_HEADER)
+
+
+@lru_cache(maxsize=2048)
+def _hash_pair(body: bytes) -> tuple[str, str]:
+    """
+    Compute (MAC, CHK) for a trailer-less frame body in one pass: hash the
+    body once for CHK, then chain the bilateral key onto the same SHA-256
+    state for the MAC instead of re-hashing the whole message
+    """
+    h = hashlib.sha256(body)
+    chk = h.hexdigest()[:12].upper()
+    h.update(_MAC_KEY)
+    mac = h.hexdigest()[:16].upper()
+    return mac, chk
+
+
+def _trailer_pair(message: bytes) -> tuple[str, str]:
+    """(MAC, CHK) for a raw frame, stripping any existing Block 5 first"""
+    return _hash_pair(_TRAILER_STRIP_RE.sub(b'', message))
+
+
+def _frame_with_trailer(prefix_hash, header: bytes, tail: bytes) -> bytes:
+    """
+    Assemble header + tail + Block 5 trailer, resuming the precomputed
+    hash state of the static header so only the tail is hashed here
+    """
+    h = prefix_hash.copy()
+    h.update(tail)
+    checksum = h.hexdigest()[:12].upper()
+    h.update(_MAC_KEY)
+    mac = h.hexdigest()[:16].upper()
+    return b''.join((header, tail, b'{5:{MAC:', mac.encode('ascii'),
+                     b'}{CHK:', checksum.encode('ascii'), b'}}'))
+
+
+def calculate_swift_checksum(message: bytes) -> str:
     """
     Calculate SWIFT checksum (simplified version for demonstration)
     Real SWIFT uses a complex LAU (Logical Authentication Unit) algorithm
     This is a mock implementation using SHA-256
     """
-    # Remove existing trailer for calculation
-    message_without_trailer = re.sub(r'\{5:.*?\}\}$', '', message, flags=re.DOTALL)
-    checksum = hashlib.sha256(message_without_trailer.encode('utf-8')).hexdigest()[:12]
-    return checksum.upper()
+    # Remove existing trailer for calculation; no encode round-trip
+    return _sha256_hex12(_TRAILER_STRIP_RE.sub(b'', message))
 
 
-def calculate_mac(message: str, key: str = "MOCK_SECRET_KEY") -> str:
+def calculate_mac(message: bytes, key: bytes = _MAC_KEY) -> str:
     """
     Calculate Message Authentication Code
     Real SWIFT uses bilateral keys and HMAC-SHA256
     This is a simplified implementation for testing
     """
-    hmac = hashlib.sha256(f"{message}{key}".encode('utf-8')).hexdigest()[:16]
-    return hmac.upper()
+    # Stream the key into the hasher instead of materialising message+key
+    h = hashlib.sha256(message)
+    h.update(key)
+    return h.hexdigest()[:16].upper()
 
 
-def validate_trailer(message: str) -> tuple[bool, str]:
+def validate_trailer(message: bytes) -> tuple[bool, str]:
     """
     Validate Block 5 trailer (CHK and MAC)
     Returns (is_valid, reason)
     """
+    # Cheap literal probe first: bytes.__contains__ is a C substring scan,
+    # far cheaper than walking the trailer regex over a trailer-less frame
+    if b'{5:{MAC:' not in message:
+        return False, "Missing Block 5 trailer"
+    
     # Extract Block 5
-    block5_match = re.search(r'\{5:\{MAC:([A-F0-9]+)\}\{CHK:([A-F0-9]+)\}\}', message, re.DOTALL)
+    block5_match = _TRAILER_RE.search(message)
     
     if not block5_match:
         return False, "Missing Block 5 trailer"
     
-    provided_mac = block5_match.group(1)
-    provided_chk = block5_match.group(2)
+    provided_mac = block5_match.group(1).decode('ascii')
+    provided_chk = block5_match.group(2).decode('ascii')
     
-    # Calculate expected values
-    expected_chk = calculate_swift_checksum(message)
-    expected_mac = calculate_mac(message)
+    # Calculate expected values over the shared stripped body, matching
+    # how the sending side computes its trailer
+    expected_mac, expected_chk = _trailer_pair(message)
     
     if provided_chk != expected_chk:
         return False, f"Checksum mismatch: expected {expected_chk}, got {provided_chk}"
@@ -145,79 +304,92 @@ def validate_trailer(message: str) -> tuple[bool, str]:
     return True, "Valid"
 
 
-def parse_mt103(message: str) -> Dict:
-    """Enhanced parser with Block 3 (UETR) and Block 5 (trailer) support"""
+def parse_mt103(message: bytes) -> Dict:
+    """Enhanced parser with Block 3 (UETR) and Block 5 (trailer) support
+
+    Runs on the raw bytes; only the small captured values are decoded for
+    the parsed dict (they end up in JSON logs).
+    """
     parsed_data = {
-        "raw_message": message
+        "raw_message": message.decode('utf-8', errors='replace')
     }
     
+    # Blocks 1-3 have fully fixed delimiters, so plain find/slice beats
+    # spinning up the regex engine for them
+    
     # Block 1: Basic Header
-    block1_match = re.search(r'\{1:([^\}]+)\}', message)
-    if block1_match:
-        parsed_data["block1"] = block1_match.group(1)
+    pos = message.find(b'{1:')
+    if pos != -1:
+        end = message.find(b'}', pos + 3)
+        if end > pos + 3:
+            parsed_data["block1"] = message[pos + 3:end].decode('ascii')
     
     # Block 2: Application Header
-    block2_match = re.search(r'\{2:([^\}]+)\}', message)
-    if block2_match:
-        parsed_data["block2"] = block2_match.group(1)
+    pos = message.find(b'{2:')
+    if pos != -1:
+        end = message.find(b'}', pos + 3)
+        if end > pos + 3:
+            parsed_data["block2"] = message[pos + 3:end].decode('ascii')
     
     # Block 3: User Header (contains UETR for gpi)
-    block3_match = re.search(r'\{3:\{108:([^\}]+)\}\}', message)
-    if block3_match:
-        parsed_data["uetr"] = block3_match.group(1)
+    pos = message.find(b'{3:{108:')
+    if pos != -1:
+        end = message.find(b'}', pos + 8)
+        if end > pos + 8 and message[end:end + 2] == b'}}':
+            parsed_data["uetr"] = message[pos + 8:end].decode('ascii')
     
     # Block 4: Text Block
-    block4_match = re.search(r'\{4:(.*?)-\}', message, re.DOTALL)
+    block4_match = _BLOCK4_RE.search(message)
     if block4_match:
         block4_content = block4_match.group(1)
         
         # Tag 20: Transaction Reference
-        ref_match = re.search(r':20:(\S+)', block4_content)
+        ref_match = _TAG20_RE.search(block4_content)
         if ref_match:
-            parsed_data["transaction_reference"] = ref_match.group(1)
+            parsed_data["transaction_reference"] = ref_match.group(1).decode('ascii')
         
         # Tag 32A: Value Date, Currency, Amount
-        value_match = re.search(r':32A:(\d{6})(\w{3})([\d,\.]+)', block4_content)
+        value_match = _TAG32A_RE.search(block4_content)
         if value_match:
-            parsed_data["value_date"] = value_match.group(1)
-            parsed_data["currency"] = value_match.group(2)
-            parsed_data["amount"] = value_match.group(3)
+            parsed_data["value_date"] = value_match.group(1).decode('ascii')
+            parsed_data["currency"] = value_match.group(2).decode('ascii')
+            parsed_data["amount"] = value_match.group(3).decode('ascii')
         
         # Tag 34: Sequence Number
-        seq_match = re.search(r':34:(\d+)', block4_content)
+        seq_match = _TAG34_RE.search(block4_content)
         if seq_match:
             parsed_data["sequence_number"] = int(seq_match.group(1))
         
         # Tag 50K: Ordering Customer
-        ordering_match = re.search(r':50K:(.+?)(?=:|$)', block4_content, re.DOTALL)
+        ordering_match = _TAG50K_RE.search(block4_content)
         if ordering_match:
-            parsed_data["ordering_customer"] = ordering_match.group(1).strip()
+            parsed_data["ordering_customer"] = ordering_match.group(1).strip().decode('utf-8', 'replace')
         
         # Tag 59: Beneficiary
-        beneficiary_match = re.search(r':59:(.+?)(?=:|$)', block4_content, re.DOTALL)
+        beneficiary_match = _TAG59_RE.search(block4_content)
         if beneficiary_match:
-            parsed_data["beneficiary_customer"] = beneficiary_match.group(1).strip()
+            parsed_data["beneficiary_customer"] = beneficiary_match.group(1).strip().decode('utf-8', 'replace')
     
-    # Block 5: Trailer
-    block5_match = re.search(r'\{5:(.+?)\}\}$', message, re.DOTALL)
+    # Block 5: Trailer (same literal-probe gating)
+    block5_match = _BLOCK5_RE.search(message) if b'{5:' in message else None
     if block5_match:
         block5_content = block5_match.group(1)
-        mac_match = re.search(r'\{MAC:([A-F0-9]+)\}', block5_content)
-        chk_match = re.search(r'\{CHK:([A-F0-9]+)\}', block5_content)
+        mac_match = _MAC_RE.search(block5_content)
+        chk_match = _CHK_RE.search(block5_content)
         
         if mac_match:
-            parsed_data["mac"] = mac_match.group(1)
+            parsed_data["mac"] = mac_match.group(1).decode('ascii')
         if chk_match:
-            parsed_data["checksum"] = chk_match.group(1)
+            parsed_data["checksum"] = chk_match.group(1).decode('ascii')
     
     return parsed_data
 
 
-def generate_ack(message_data: Dict, session: Dict) -> str:
+def generate_ack(message_data: Dict, session: Dict, now: datetime.datetime) -> bytes:
     """Generate ACK (F21 acknowledgment)"""
-    now = datetime.datetime.now()
-    ack_time = now.strftime("%H%M")
-    ack_date = now.strftime("%y%m%d")
+    # f-string field access skips strftime's format parsing
+    ack_time = f"{now.hour:02d}{now.minute:02d}"
+    ack_date = f"{now.year % 100:02d}{now.month:02d}{now.day:02d}"
     
     uetr = message_data.get('uetr', f"ACK-{now.strftime('%Y%m%d%H%M%S')}")
     transaction_ref = message_data.get('transaction_reference', 'UNKNOWN')
@@ -225,32 +397,26 @@ def generate_ack(message_data: Dict, session: Dict) -> str:
     # Increment output sequence
     session['output_seq'] += 1
     
-    ack_message = (
-        f"{{1:F21MOCKSVRXXXXAXXX0000000000}}"
-        f"{{2:I901MOCKRCVRXXXXN}}"
-        f"{{4:\n"
+    # Static header stays pre-encoded and pre-hashed; only the variable
+    # tail is built, encoded and hashed per message
+    tail = (
         f":20:{transaction_ref}\n"
         f":34:{session['output_seq']}\n"
         f":77E:ACK\n"
         f":108:{uetr}\n"
         f":177:{ack_date}{ack_time}\n"
         f":451:0\n"
-        f"-}}\n"
+        f"-}}\n".encode('utf-8')
     )
     
-    # Calculate and append Block 5
-    checksum = calculate_swift_checksum(ack_message)
-    mac = calculate_mac(ack_message)
-    ack_message += f"{{5:{{MAC:{mac}}}{{CHK:{checksum}}}}}"
-    
-    return ack_message
+    return _frame_with_trailer(_ACK_PREFIX_HASH, _ACK_HEADER, tail)
 
 
-def generate_nack(message_data: Dict, session: Dict, error_code: str = "5", reason: str = "VALIDATION_ERROR") -> str:
+def generate_nack(message_data: Dict, session: Dict, now: datetime.datetime,
+                  error_code: str = "5", reason: str = "VALIDATION_ERROR") -> bytes:
     """Generate NACK (negative acknowledgment)"""
-    now = datetime.datetime.now()
-    nack_time = now.strftime("%H%M")
-    nack_date = now.strftime("%y%m%d")
+    nack_time = f"{now.hour:02d}{now.minute:02d}"
+    nack_date = f"{now.year % 100:02d}{now.month:02d}{now.day:02d}"
     
     transaction_ref = message_data.get('transaction_reference', 'UNKNOWN')
     
@@ -258,47 +424,31 @@ def generate_nack(message_data: Dict, session: Dict, error_code: str = "5", reas
     session['output_seq'] += 1
     
     # NACK uses MsgType 21 with non-zero error code in tag 451
-    nack_message = (
-        f"{{1:F21MOCKSVRXXXXAXXX0000000000}}"
-        f"{{2:I901MOCKRCVRXXXXN}}"
-        f"{{4:\n"
+    tail = (
         f":20:{transaction_ref}\n"
         f":34:{session['output_seq']}\n"
         f":77E:NACK\n"
         f":177:{nack_date}{nack_time}\n"
         f":451:{error_code}\n"
         f":79:{reason}\n"
-        f"-}}\n"
+        f"-}}\n".encode('utf-8')
     )
     
-    checksum = calculate_swift_checksum(nack_message)
-    mac = calculate_mac(nack_message)
-    nack_message += f"{{5:{{MAC:{mac}}}{{CHK:{checksum}}}}}"
-    
-    return nack_message
+    return _frame_with_trailer(_ACK_PREFIX_HASH, _ACK_HEADER, tail)
 
 
-def generate_resend_request(session: Dict, from_seq: int, to_seq: int) -> str:
+def generate_resend_request(session: Dict, from_seq: int, to_seq: int) -> bytes:
     """Generate Resend Request (MsgType 2)"""
-    now = datetime.datetime.now()
-    
     session['output_seq'] += 1
     
-    resend_message = (
-        f"{{1:F02MOCKSVRXXXXAXXX0000000000}}"
-        f"{{2:I2MOCKRCVRXXXXN}}"
-        f"{{4:\n"
+    tail = (
         f":34:{session['output_seq']}\n"
         f":7:{from_seq}\n"
         f":16:{to_seq}\n"
-        f"-}}\n"
+        f"-}}\n".encode('utf-8')
     )
     
-    checksum = calculate_swift_checksum(resend_message)
-    mac = calculate_mac(resend_message)
-    resend_message += f"{{5:{{MAC:{mac}}}{{CHK:{checksum}}}}}"
-    
-    return resend_message
+    return _frame_with_trailer(_RESEND_PREFIX_HASH, _RESEND_HEADER, tail)
 
 
 def check_sequence_gap(session: Dict, received_seq: int) -> Optional[tuple[int, int]]:
@@ -315,132 +465,211 @@ def check_sequence_gap(session: Dict, received_seq: int) -> Optional[tuple[int,
     return None
 
 
-def handle_client(conn, addr):
-    """Enhanced client handler with adversarial capabilities"""
-    session_id = f"SESSION-{addr[0]}-{addr[1]}"
-    session = state.get_session(session_id)
-    
-    print(f"\n{'='*60}")
-    print(f"Connected by {addr}")
-    print(f"Session ID: {session_id}")
-    print(f"Current Input Seq: {session['input_seq']}, Output Seq: {session['output_seq']}")
-    print(f"{'='*60}\n")
-    
+class ClientConnection:
+    """Per-connection context tracked by the event loop"""
+
+    def __init__(self, conn, addr):
+        self.conn = conn
+        self.addr = addr
+        self.session_id = f"SESSION-{addr[0]}-{addr[1]}"
+        self.session = state.get_session(self.session_id)
+        self.buf = bytearray()  # partial-frame accumulator
+        # Preallocated receive buffer: recv_into fills it in place, so the
+        # read path allocates nothing per call
+        self.rbuf = bytearray(65536)
+        self.rview = memoryview(self.rbuf)
+
+
+def _accept_client(sel, server_sock):
+    """Accept a connection and register it with the selector"""
+    conn, addr = server_sock.accept()
+    # Small ACK/NACK frames must not sit in Nagle's buffer, and keepalive
+    # lets the OS notice half-dead test clients
+    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    conn.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    client = ClientConnection(conn, addr)
+
+    log.info("Connected by %s (session %s, input_seq=%d output_seq=%d)",
+             addr, client.session_id,
+             client.session['input_seq'], client.session['output_seq'])
+
+    sel.register(conn, selectors.EVENT_READ, client)
+
+
+def _extract_frame(buf: bytearray):
+    """
+    Pull one complete SWIFT frame off the front of the buffer.
+    A frame ends at the block-4 '-}' terminator, extended by the Block 5
+    trailer when one follows. Returns (frame, bytes_consumed) or None if
+    the buffer does not hold a complete frame yet.
+    """
+    idx = buf.find(b'-}')
+    if idx == -1:
+        return None
+    end = idx + 2
+    
+    trailer = _TRAILER_AFTER_RE.match(buf, end)
+    if trailer:
+        end = trailer.end()
+    else:
+        rest = bytes(buf[end:]).lstrip()
+        if rest and b'{5:'.startswith(rest[:3]):
+            # Trailer has started but is still in flight - wait for it
+            return None
+    
+    return bytes(buf[:end]), end
+
+
+def _service_client(sel, client):
+    """Read what the selector says is ready and dispatch complete frames"""
+    keep_open = True
     try:
-        while True:
-            data = conn.recv(8192)
-            if not data:
-                print(f"Client {addr} disconnected.")
-                break
-            
-            message = data.decode('utf-8').strip()
-            print(f"\n--- Received SWIFT Message from {addr} ---")
-            print(message[:500])  # Print first 500 chars
-            print("------------------------------------------")
-            
-            # Parse message
-            parsed_data = parse_mt103(message)
-            
-            # Extract sequence number
-            received_seq = parsed_data.get('sequence_number', 0)
-            
-            print(f"\nParsed Details:")
-            print(f"  Transaction Reference: {parsed_data.get('transaction_reference', 'N/A')}")
-            print(f"  Sequence Number: {received_seq}")
-            print(f"  Currency: {parsed_data.get('currency', 'N/A')}")
-            print(f"  Amount: {parsed_data.get('amount', 'N/A')}")
-            print(f"  UETR: {parsed_data.get('uetr', 'N/A')}")
-            
-            # Log message
-            state.log_message(session_id, 'INBOUND', message, parsed_data)
-            
-            # ====== ADVERSARIAL TESTING LOGIC ======
-            
-            # 1. Check if we should drop connection
-            if state.error_mode == 'drop_connection':
-                print(f"\n⚠️  ADVERSARIAL MODE: Dropping connection without response")
-                state.error_mode = None  # Reset
-                break
-            
-            # 2. Validate MAC/Checksum (if not in ignore mode)
-            if parsed_data.get('mac') and parsed_data.get('checksum'):
-                is_valid, validation_reason = validate_trailer(message)
-                print(f"\n🔒 Trailer Validation: {validation_reason}")
-                
-                if not is_valid:
-                    print(f"❌ INVALID TRAILER - Sending NACK")
-                    nack_response = generate_nack(parsed_data, session, "5", validation_reason)
-                    conn.sendall(nack_response.encode('utf-8'))
-                    print(f"\n--- Sent NACK to {addr} ---")
-                    print(nack_response[:300])
-                    state.log_message(session_id, 'OUTBOUND', nack_response, {'type': 'NACK', 'reason': validation_reason})
-                    continue
-            
-            # 3. Check sequence gap
-            gap = check_sequence_gap(session, received_seq)
-            if gap and received_seq not in state.ignored_sequences:
-                from_seq, to_seq = gap
-                print(f"\n⚠️  SEQUENCE GAP DETECTED: Expected {session['input_seq'] + 1}, got {received_seq}")
-                print(f"   Missing sequences: {from_seq} to {to_seq}")
-                
-                # Send Resend Request
-                resend_request = generate_resend_request(session, from_seq, to_seq)
-                conn.sendall(resend_request.encode('utf-8'))
-                print(f"\n--- Sent RESEND REQUEST to {addr} ---")
-                print(resend_request)
-                state.log_message(session_id, 'OUTBOUND', resend_request, {
-                    'type': 'RESEND_REQUEST',
-                    'from_seq': from_seq,
-                    'to_seq': to_seq
-                })
-                
-                # Don't update input_seq yet - wait for missing messages
-                continue
-            
-            # 4. Check if this sequence should be ignored (simulate gap)
-            if received_seq in state.ignored_sequences:
-                print(f"\n⚠️  ADVERSARIAL MODE: Ignoring sequence {received_seq}")
-                state.ignored_sequences.remove(received_seq)
-                # Don't respond, don't update sequence
-                continue
-            
-            # 5. Check if we should NACK this message
-            if state.error_mode == 'nack_next':
-                print(f"\n⚠️  ADVERSARIAL MODE: Sending NACK")
-                state.error_mode = None  # Reset
-                nack_response = generate_nack(parsed_data, session, "7", "ADVERSARIAL_TEST")
-                conn.sendall(nack_response.encode('utf-8'))
-                print(f"\n--- Sent NACK to {addr} ---")
-                print(nack_response[:300])
-                state.log_message(session_id, 'OUTBOUND', nack_response, {'type': 'NACK', 'reason': 'ADVERSARIAL_TEST'})
-                # Update input sequence even for NACK
-                session['input_seq'] = received_seq
-                state.save_state()
-                continue
-            
-            # 6. Normal flow - Send ACK
-            ack_response = generate_ack(parsed_data, session)
-            conn.sendall(ack_response.encode('utf-8'))
-            
-            print(f"\n--- Sent ACK to {addr} ---")
-            print(ack_response[:300])
-            
-            # Update input sequence
-            session['input_seq'] = received_seq
-            session['last_heartbeat'] = datetime.datetime.now()
-            state.save_state()
-            
-            state.log_message(session_id, 'OUTBOUND', ack_response, {'type': 'ACK'})
-            
-            print(f"\n✓ Session updated: Input Seq={session['input_seq']}, Output Seq={session['output_seq']}")
-    
-    except Exception as e:
-        print(f"❌ Error handling client {addr}: {e}")
-        import traceback
-        traceback.print_exc()
-    finally:
-        conn.close()
-        print(f"\nConnection closed: {addr}")
+        nbytes = client.conn.recv_into(client.rview)
+        if nbytes:
+            # TCP gives us a byte stream: accumulate, then peel off as many
+            # complete frames as arrived (possibly several per recv, or a
+            # fraction of one)
+            client.buf.extend(client.rview[:nbytes])
+            while keep_open:
+                extracted = _extract_frame(client.buf)
+                if extracted is None:
+                    break
+                frame, consumed = extracted
+                del client.buf[:consumed]
+                keep_open = handle_message(client, frame.strip())
+        else:
+            log.info("Client %s disconnected.", client.addr)
+            keep_open = False
+    except (ConnectionResetError, BrokenPipeError):
+        keep_open = False
+    except Exception:
+        log.exception("Error handling client %s", client.addr)
+        keep_open = False
+
+    if not keep_open:
+        sel.unregister(client.conn)
+        client.conn.close()
+        log.info("Connection closed: %s", client.addr)
+
+
+def handle_message(client, message: bytes) -> bool:
+    """
+    Enhanced message handler with adversarial capabilities.
+    Takes the raw frame bytes; returns False when the connection should
+    be dropped.
+    """
+    conn = client.conn
+    addr = client.addr
+    session_id = client.session_id
+    session = client.session
+
+    now = datetime.datetime.now()  # one clock read per frame
+    # Parse on the raw bytes; the decoded text is only built for the
+    # trace and the audit log
+    parsed_data = parse_mt103(message)
+    text = parsed_data["raw_message"]
+
+    # Extract sequence number
+    received_seq = parsed_data.get('sequence_number', 0)
+
+    # Guarded so the slices/f-strings are never built when DEBUG is off
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("--- Received SWIFT Message from %s ---\n%s", addr, text[:500])
+        log.debug("Parsed: ref=%s seq=%s currency=%s amount=%s uetr=%s",
+                  parsed_data.get('transaction_reference', 'N/A'), received_seq,
+                  parsed_data.get('currency', 'N/A'),
+                  parsed_data.get('amount', 'N/A'),
+                  parsed_data.get('uetr', 'N/A'))
+
+    # Log message
+    state.log_message(session_id, 'INBOUND', text, parsed_data, now)
+
+    # ====== ADVERSARIAL TESTING LOGIC ======
+
+    # Snapshot the injection knobs once per message so the chain below
+    # works off one consistent view
+    error_mode = state.error_mode
+    is_ignored = received_seq in state.ignored_sequences
+
+    # 1. Check if we should drop connection
+    if error_mode == 'drop_connection':
+        log.info("⚠️  ADVERSARIAL MODE: Dropping connection without response")
+        state.error_mode = None  # Reset
+        return False
+
+    # 2. Validate MAC/Checksum (if not in ignore mode)
+    if parsed_data.get('mac') and parsed_data.get('checksum'):
+        is_valid, validation_reason = validate_trailer(message)
+        log.debug("🔒 Trailer Validation: %s", validation_reason)
+
+        if not is_valid:
+            log.info("❌ INVALID TRAILER - Sending NACK (%s)", validation_reason)
+            nack_response = generate_nack(parsed_data, session, now, "5", validation_reason)
+            conn.sendall(nack_response)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("--- Sent NACK to %s ---\n%s", addr, nack_response[:300].decode('utf-8'))
+            state.log_message(session_id, 'OUTBOUND', nack_response, {'type': 'NACK', 'reason': validation_reason})
+            return True
+
+    # 3. Check sequence gap
+    gap = check_sequence_gap(session, received_seq)
+    if gap and not is_ignored:
+        from_seq, to_seq = gap
+        log.info("⚠️  SEQUENCE GAP DETECTED: expected %d, got %d (missing %d..%d)",
+                 session['input_seq'] + 1, received_seq, from_seq, to_seq)
+
+        # Send Resend Request
+        resend_request = generate_resend_request(session, from_seq, to_seq)
+        conn.sendall(resend_request)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("--- Sent RESEND REQUEST to %s ---\n%s", addr, resend_request.decode('utf-8'))
+        state.log_message(session_id, 'OUTBOUND', resend_request, {
+            'type': 'RESEND_REQUEST',
+            'from_seq': from_seq,
+            'to_seq': to_seq
+        })
+
+        # Don't update input_seq yet - wait for missing messages
+        return True
+
+    # 4. Check if this sequence should be ignored (simulate gap)
+    if is_ignored:
+        log.info("⚠️  ADVERSARIAL MODE: Ignoring sequence %d", received_seq)
+        state.ignored_sequences.discard(received_seq)
+        # Don't respond, don't update sequence
+        return True
+
+    # 5. Check if we should NACK this message
+    if error_mode == 'nack_next':
+        log.info("⚠️  ADVERSARIAL MODE: Sending NACK")
+        state.error_mode = None  # Reset
+        nack_response = generate_nack(parsed_data, session, now, "7", "ADVERSARIAL_TEST")
+        conn.sendall(nack_response)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("--- Sent NACK to %s ---\n%s", addr, nack_response[:300].decode('utf-8'))
+        state.log_message(session_id, 'OUTBOUND', nack_response, {'type': 'NACK', 'reason': 'ADVERSARIAL_TEST'})
+        # Update input sequence even for NACK
+        session['input_seq'] = received_seq
+        state.mark_dirty()
+        return True
+
+    # 6. Normal flow - Send ACK
+    ack_response = generate_ack(parsed_data, session, now)
+    conn.sendall(ack_response)
+
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("--- Sent ACK to %s ---\n%s", addr, ack_response[:300].decode('utf-8'))
+
+    # Update input sequence
+    session['input_seq'] = received_seq
+    session['last_heartbeat'] = now
+    state.mark_dirty()
+
+    state.log_message(session_id, 'OUTBOUND', ack_response, {'type': 'ACK'})
+
+    log.debug("✓ Session updated: input_seq=%d output_seq=%d",
+              session['input_seq'], session['output_seq'])
+    return True
 
 
 # ====== CONTROL API FOR ADVERSARIAL TESTING ======
@@ -448,48 +677,43 @@ def handle_client(conn, addr):
 class ControlAPIHandler(BaseHTTPRequestHandler):
     """REST API to control mock server behavior"""
     
+    # HTTP/1.1 + explicit Content-Length enables keep-alive, so polling
+    # harnesses reuse one connection instead of a handshake per request
+    protocol_version = "HTTP/1.1"
+    
     def log_message(self, format, *args):
         """Suppress default logging"""
         pass
     
+    def _send_json(self, payload: bytes, status: int = 200):
+        """Write a JSON response with the length header keep-alive needs"""
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
     def do_GET(self):
         """Handle GET requests"""
         if self.path == '/status':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            response = {
-                'status': 'running',
-                'sessions': len(state.sessions),
-                'error_mode': state.error_mode,
-                'ignored_sequences': state.ignored_sequences,
-                'message_count': len(state.message_log),
-                'session_details': {
-                    sid: {
-                        'input_seq': s['input_seq'],
-                        'output_seq': s['output_seq'],
-                        'connected': s['connected']
-                    }
-                    for sid, s in state.sessions.items()
-                }
-            }
-            self.wfile.write(json.dumps(response, indent=2).encode('utf-8'))
+            # Pre-encoded and cached; polling loops don't re-serialize or
+            # copy the session map unless something changed
+            self._send_json(state.status_payload())
         
         elif self.path == '/messages':
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            
-            # Return last 50 messages
+            # Return last 50 messages (snapshotted under the log lock)
+            with state._log_lock:
+                recent = list(state.message_log)[-50:]
+                total = len(state.message_log)
             response = {
-                'messages': state.message_log[-50:],
-                'total_count': len(state.message_log)
+                'messages': recent,
+                'total_count': total
             }
-            self.wfile.write(json.dumps(response, indent=2, default=str).encode('utf-8'))
+            self._send_json(_dumps(response))
         
         else:
             self.send_response(404)
+            self.send_header('Content-Length', '0')
             self.end_headers()
     
     def do_POST(self):
@@ -501,6 +725,7 @@ class ControlAPIHandler(BaseHTTPRequestHandler):
             data = json.loads(post_data.decode('utf-8'))
         except:
             self.send_response(400)
+            self.send_header('Content-Length', str(len(b'Invalid JSON')))
             self.end_headers()
             self.wfile.write(b'Invalid JSON')
             return
@@ -511,21 +736,21 @@ class ControlAPIHandler(BaseHTTPRequestHandler):
             
             if error_type == 'ignore_sequence':
                 sequences = data.get('sequences', [])
-                state.ignored_sequences.extend(sequences)
+                state.ignored_sequences.update(sequences)
+                state._status_cache = None
                 response_msg = f"Will ignore sequences: {sequences}"
             elif error_type in ['nack_next', 'drop_connection']:
                 state.error_mode = error_type
+                state._status_cache = None
                 response_msg = f"Error mode set to: {error_type}"
             else:
                 self.send_response(400)
+                self.send_header('Content-Length', str(len(b'Invalid error_type')))
                 self.end_headers()
                 self.wfile.write(b'Invalid error_type')
                 return
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'ok', 'message': response_msg}).encode('utf-8'))
+            self._send_json(json.dumps({'status': 'ok', 'message': response_msg}).encode('utf-8'))
             print(f"\n⚠️  Control API: {response_msg}")
         
         elif self.path == '/reset':
@@ -534,22 +759,22 @@ class ControlAPIHandler(BaseHTTPRequestHandler):
             state.message_log.clear()
             state.error_mode = None
             state.ignored_sequences.clear()
+            state._status_cache = None
             state.save_state()
             
-            self.send_response(200)
-            self.send_header('Content-type', 'application/json')
-            self.end_headers()
-            self.wfile.write(json.dumps({'status': 'ok', 'message': 'State reset'}).encode('utf-8'))
+            self._send_json(json.dumps({'status': 'ok', 'message': 'State reset'}).encode('utf-8'))
             print(f"\n🔄 Control API: State reset")
         
         else:
             self.send_response(404)
+            self.send_header('Content-Length', '0')
             self.end_headers()
 
 
 def start_control_api():
     """Start REST API server for control"""
-    server = HTTPServer(('localhost', CONTROL_API_PORT), ControlAPIHandler)
+    # Threading server: a slow poller no longer blocks injection POSTs
+    server = ThreadingHTTPServer(('localhost', CONTROL_API_PORT), ControlAPIHandler)
     print(f"Control API listening on http://localhost:{CONTROL_API_PORT}")
     print(f"  GET  /status          - View current state")
     print(f"  GET  /messages        - View message log")
@@ -559,11 +784,15 @@ def start_control_api():
 
 
 def start_swift_server():
-    """Start SWIFT TCP server"""
+    """Start SWIFT TCP server on a selectors event loop"""
+    sel = selectors.DefaultSelector()
+    
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         s.bind((HOST, PORT))
         s.listen()
+        s.setblocking(False)
+        sel.register(s, selectors.EVENT_READ, None)
         print(f"SWIFT Mock Server (Production-Grade) listening on {HOST}:{PORT}")
         print(f"State persistence: {STATE_FILE}")
         print(f"\nAdversarial Features:")
@@ -574,10 +803,14 @@ def start_swift_server():
         print(f"  ✓ Control API for error injection")
         print(f"\nWaiting for connections...\n")
         
+        # One thread multiplexes every session: no per-connection stack,
+        # no GIL handoff between client threads on the parse/hash hot path
         while True:
-            conn, addr = s.accept()
-            client_handler = threading.Thread(target=handle_client, args=(conn, addr), daemon=True)
-            client_handler.start()
+            for key, _ in sel.select():
+                if key.data is None:
+                    _accept_client(sel, s)
+                else:
+                    _service_client(sel, key.data)
 
 
 if __name__ == "__main__":
@@ -12,14 +12,25 @@ Critical Enhancements:
 7. ✅ Real sequence number validation
 """
 
+import asyncio
+import atexit
 import socket
 import threading
 import json
+import logging
+import queue
 import time
 import hmac
 import hashlib
+import types
+from collections import namedtuple, OrderedDict
 import re
-from flask import Flask, request, jsonify
+import os
+import orjson
+import uvicorn
+from fastapi import FastAPI, Request
+from logging.handlers import QueueHandler, QueueListener
+from fastapi.responses import JSONResponse
 from datetime import datetime
 
 # Configuration
@@ -27,69 +38,201 @@ TCP_HOST = 'localhost'
 TCP_PORT = 10103
 API_PORT = 8888
 STATE_FILE = '/tmp/swift_mock_state_v3.json'
+MESSAGE_LOG_FILE = '/tmp/swift_mock_state_v3.log'
+MESSAGE_CAP = 10000  # oldest stored messages are evicted beyond this
+CONTENT_LOG_FILE = '/tmp/swift_msgs.bin'
 
 # Global state
 mock_state = {
     "sessions": {},  # sessionId -> session data
-    "messages": {},  # messageId -> message data
+    "messages": OrderedDict(),  # messageId -> message data, oldest first
     "simulation_mode": None,  # 'nack', 'timeout', 'latency', etc.
     "latency_ms": 0,
     "message_count": 0
 }
 
+# Per-message diagnostics go through a queued logger: the event loop only
+# enqueues records and a background thread does the stream writes, so no
+# stdout flush ever stalls the hot path. Startup banners stay as prints.
+_log_queue = queue.SimpleQueue()
+logger = logging.getLogger('swift')
+logger.setLevel(logging.INFO)
+logger.addHandler(QueueHandler(_log_queue))
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
+
+# Append-only message journal: the TCP thread enqueues one record per
+# message and a writer thread appends it as a JSON line - O(1) per
+# message instead of re-serialising the whole state every 10 messages.
+_log_q = queue.Queue()
+
+
+def _log_writer():
+    fd = os.open(MESSAGE_LOG_FILE, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    while True:
+        message_id, record = _log_q.get()
+        line = json.dumps([message_id, record]).encode('utf-8') + b'\n'
+        os.write(fd, line)
+
+
+threading.Thread(target=_log_writer, daemon=True).start()
+
+# Raw message previews go to an append-only binary log; records keep only
+# (offset, length), so no per-message str slice is decoded, stored and
+# re-serialised on every checkpoint. Unbuffered: every preview hits the
+# OS immediately, so nothing is lost on crash/shutdown and the offsets
+# in the journal always point at real bytes.
+_content_log = open(CONTENT_LOG_FILE, 'ab', buffering=0)
+
+
+def _read_preview(content):
+    """Resolve a stored preview: {off, len} into CONTENT_LOG_FILE, or the
+    inline string from records written by older versions"""
+    if isinstance(content, dict):
+        try:
+            with open(CONTENT_LOG_FILE, 'rb') as f:
+                f.seek(content.get('off', 0))
+                return f.read(content.get('len', 0)).decode('utf-8', errors='replace')
+        except OSError:
+            return None
+    return content
+
+# One alternation covers tag 20, tag 34 and the type markers, so a frame
+# is scanned once instead of once per extractor
+_TAGS_RE = re.compile(rb'(?::20:([^\r\n]+))|(?::34:(\d+))|(LOGIN)|(MT103)|(:32A:)')
+
+_ScanResult = namedtuple('_ScanResult', 'msg_type msg_id seq_num')
+
+# Response templates, encoded once at import; only the variable fields
+# are %-substituted per message, so the constant framing is never
+# rebuilt or re-encoded on the hot path
+# ACK/NACK are fully specialised: fixed byte segments joined around the
+# variable fields - b''.join sizes the result in one C-level pass, with
+# not even %-format parsing left at call time
+_ACK_SEGS = (b"{1:F21MOCKSVRXXXXAXXX0000000000}{2:I901MOCKRCVRXXXXN}{4:\n:20:",
+             b"\n:34:",
+             b"\n:77E:ACK\n:108:DEMO-UETR-",
+             b"\n:177:",
+             b"\n:451:0\n-}\n{5:{MAC:TESTMAC}{CHK:TESTCHK}}\n")
+_NACK_SEGS = (b"{1:F21MOCKSVRXXXXAXXX0000000000}{2:I901MOCKRCVRXXXXN}{4:\n:20:",
+              b"\n:34:",
+              b"\n:77E:NACK\n:451:",
+              b"\n:79:",
+              b"\n-}\n{5:{MAC:TESTMAC}{CHK:TESTCHK}}\n")
+_RESEND_TMPL = (b"{1:F02MOCKSVRXXXXAXXX0000000000}{2:I2MOCKRCVRXXXXN}{4:\n"
+                b":7:1\n:16:%d\n:17:%d\n-}\n"
+                b"{5:{MAC:TESTMAC}{CHK:TESTCHK}}\n")
+_ERROR_TMPL = (b"{1:F21MOCKSVRXXXXAXXX0000000000}{2:I901MOCKRCVRXXXXN}{4:\n"
+               b":20:ERROR\n:451:%b\n:79:%b\n-}\n")
+_LOGIN_ACK_TMPL = (b"{1:F01MOCKSVRXXXXAXXX0000000000}{2:I001MOCKRCVRXXXXN}{4:\n"
+                   b":20:LOGIN-ACK\n:108:SESSION-%b\n:79:Login successful\n-}")
+_LOGIN_BANNER = (b"{1:F01MOCKSVRXXXXAXXX0000000000}"
+                 b"{2:I001MOCKRCVRXXXXN}"
+                 b"{4:\n:20:LOGIN_OK\n:79:LOGIN_SUCCESSFUL\n-}"
+                 b"{5:{MAC:ABCD1234}{CHK:5678EFGH}}\n")
+
+# The :177: stamp has minute resolution, so recompute it at most once
+# per minute instead of running strftime per message
+_TS_CACHE = [0, b'']
+
+
+def _ts_minute() -> bytes:
+    minute = int(time.time() // 60)
+    if minute != _TS_CACHE[0]:
+        _TS_CACHE[0] = minute
+        _TS_CACHE[1] = datetime.now().strftime('%y%m%d%H%M').encode('ascii')
+    return _TS_CACHE[1]
+
+
+# Denormalised counters kept in lockstep at mutation sites, so /status
+# is a handful of attribute reads instead of len() over dicts that grow
+# with history
+_counters = types.SimpleNamespace(sessions=0, messages=0)
+
 # Session states
 ACTIVE_SESSIONS = {}
 SESSION_TIMEOUT = 300  # 5 minutes
 
-# Flask API for control
-app = Flask(__name__)
+# FastAPI app for control (served by uvicorn on its own event loop)
+app = FastAPI()
 
 def load_state():
-    """Load state from file"""
+    """Load state from file, then replay the append-only message journal"""
     global mock_state
     try:
-        with open(STATE_FILE, 'r') as f:
-            mock_state = json.load(f)
+        with open(STATE_FILE, 'rb') as f:
+            mock_state = orjson.loads(f.read())
             print(f"✅ State loaded from {STATE_FILE}")
     except FileNotFoundError:
         print("📝 No existing state file, starting fresh")
     except Exception as e:
         print(f"⚠️  Error loading state: {e}")
+    
+    try:
+        replayed = 0
+        with open(MESSAGE_LOG_FILE, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                message_id, record = json.loads(line)
+                mock_state['messages'][message_id] = record
+                replayed += 1
+        if replayed:
+            mock_state['message_count'] = max(mock_state['message_count'],
+                                              len(mock_state['messages']))
+            print(f"✅ Replayed {replayed} message(s) from {MESSAGE_LOG_FILE}")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"⚠️  Error replaying message log: {e}")
+    
+    # Tolerate state files of another shape (older format, corruption
+    # that still parses) instead of dying at startup
+    for key, default in (("sessions", {}), ("messages", {}),
+                         ("simulation_mode", None), ("latency_ms", 0),
+                         ("message_count", 0)):
+        mock_state.setdefault(key, default)
+    
+    # JSON loads a plain dict; restore the insertion-ordered ring
+    mock_state['messages'] = OrderedDict(mock_state['messages'])
+    while len(mock_state['messages']) > MESSAGE_CAP:
+        mock_state['messages'].popitem(last=False)
+    
+    _counters.sessions = len(mock_state['sessions'])
+    _counters.messages = len(mock_state['messages'])
 
 def save_state():
     """Save state to file"""
     try:
-        with open(STATE_FILE, 'w') as f:
-            # Convert sessions to serializable format
-            state_copy = mock_state.copy()
-            state_copy['sessions'] = {
-                k: {**v, 'created_at': str(v.get('created_at', '')), 
-                    'last_activity': str(v.get('last_activity', ''))}
-                for k, v in mock_state['sessions'].items()
-            }
-            json.dump(state_copy, f, indent=2, default=str)
-            print(f"💾 State saved to {STATE_FILE}")
+        # orjson serialises the whole dict in C - no state_copy, no
+        # per-session timestamp stringification (created_at/last_activity
+        # are plain floats it handles natively), no indent bloat
+        with open(STATE_FILE, 'wb') as f:
+            f.write(orjson.dumps(mock_state, default=str,
+                                 option=orjson.OPT_NON_STR_KEYS))
+        print(f"💾 State saved to {STATE_FILE}")
     except Exception as e:
         print(f"❌ Error saving state: {e}")
 
 # ========== REST API for Control ==========
 
-@app.route('/status', methods=['GET'])
-def get_status():
+@app.get('/status')
+async def get_status():
     """Get mock server status"""
-    return jsonify({
+    return {
         'status': 'running',
-        'sessions': len(mock_state['sessions']),
-        'messages': len(mock_state['messages']),
+        'sessions': _counters.sessions,
+        'messages': _counters.messages,
         'simulation_mode': mock_state['simulation_mode'],
         'latency_ms': mock_state['latency_ms'],
-        'message_count': mock_state['message_count']
-    })
+        'message_count': mock_state['message_count'],
+        'message_cap': MESSAGE_CAP
+    }
 
-@app.route('/simulate-error', methods=['POST'])
-def simulate_error():
+@app.post('/simulate-error')
+async def simulate_error(request: Request):
     """✅ Configure error simulation mode"""
-    data = request.json
+    data = await request.json()
     error_type = data.get('error_type')  # 'nack', 'timeout', 'session_invalid', 'none'
     
     mock_state['simulation_mode'] = error_type
@@ -102,68 +245,83 @@ def simulate_error():
         mock_state['latency_ms'] = data.get('latency_ms', 5000)
     
     print(f"🎭 Simulation mode set to: {error_type}")
-    save_state()
+    # File write happens off the event loop
+    await asyncio.to_thread(save_state)
     
-    return jsonify({
+    return {
         'status': 'ok',
         'simulation_mode': error_type
-    })
+    }
 
-@app.route('/query-message/<message_id>', methods=['GET'])
-def query_message(message_id):
+@app.get('/query-message/{message_id}')
+async def query_message(message_id: str):
     """✅ Query status of a message by ID"""
     if message_id in mock_state['messages']:
         msg = mock_state['messages'][message_id]
-        return jsonify({
+        ts_ns = msg.get('timestamp_ns')
+        return {
             'messageId': message_id,
             'status': msg.get('status'),
-            'timestamp': str(msg.get('timestamp')),
+            # Lazily format here; records from old state files still carry
+            # a preformatted 'timestamp'
+            'timestamp': (datetime.fromtimestamp(ts_ns / 1e9).isoformat()
+                          if ts_ns else str(msg.get('timestamp'))),
             'sequenceNumber': msg.get('sequenceNumber'),
-            'responseType': msg.get('responseType')
-        })
+            'responseType': msg.get('responseType'),
+            'content': _read_preview(msg.get('content'))
+        }
     else:
-        return jsonify({'error': 'Message not found'}), 404
+        return JSONResponse({'error': 'Message not found'}, status_code=404)
 
-@app.route('/sessions', methods=['GET'])
-def list_sessions():
+@app.get('/sessions')
+async def list_sessions():
     """List all active sessions"""
-    return jsonify({
+    return {
         'sessions': list(mock_state['sessions'].keys()),
         'count': len(mock_state['sessions'])
-    })
+    }
 
-@app.route('/reset', methods=['POST'])
-def reset_state():
+@app.post('/reset')
+async def reset_state():
     """Reset all state"""
     global mock_state
     mock_state = {
         "sessions": {},
-        "messages": {},
+        "messages": OrderedDict(),
         "simulation_mode": None,
         "latency_ms": 0,
         "message_count": 0
     }
-    save_state()
+    _counters.sessions = 0
+    _counters.messages = 0
+    await asyncio.to_thread(save_state)
+    # Truncate the journal too, or old messages would replay on restart
+    await asyncio.to_thread(lambda: open(MESSAGE_LOG_FILE, 'wb').close())
+    _content_log.truncate(0)
+    _content_log.seek(0)
     print("🔄 State reset")
-    return jsonify({'status': 'reset'})
+    return {'status': 'reset'}
 
 # ========== SWIFT Protocol Handler ==========
 
-def handle_client(conn, addr):
-    """Handle SWIFT client connection"""
-    print(f"📞 Connection from {addr}")
+async def handle_client(reader, writer):
+    """Handle SWIFT client connection on the event loop"""
+    addr = writer.get_extra_info('peername')
+    logger.info("📞 Connection from %s", addr)
+    
+    # No Nagle delay on the small ACK replies; keepalive reaps dead peers
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
     
     session_id = f"SESSION-{addr[0]}-{addr[1]}"
     
-    # ✅ Send immediate login response
-    login_response = (
-        "{1:F01MOCKSVRXXXXAXXX0000000000}"
-        "{2:I001MOCKRCVRXXXXN}"
-        "{4:\n:20:LOGIN_OK\n:79:LOGIN_SUCCESSFUL\n-}"
-        "{5:{MAC:ABCD1234}{CHK:5678EFGH}}\n"
-    )
-    conn.send(login_response.encode())
-    print(f"✅ Sent login response to {addr}")
+    # ✅ Send immediate login response (constant bytes, no per-connection
+    # rebuild or encode)
+    writer.write(_LOGIN_BANNER)
+    await writer.drain()
+    logger.info("✅ Sent login response to %s", addr)
     
     # ✅ Create session
     ACTIVE_SESSIONS[session_id] = {
@@ -175,94 +333,69 @@ def handle_client(conn, addr):
     }
     
     mock_state['sessions'][session_id] = ACTIVE_SESSIONS[session_id]
+    _counters.sessions += 1
     
     try:
+        # Persistent accumulator: frames split across reads reassemble here
+        # and pipelined frames in one read each get peeled off
+        buf = bytearray()
         while True:
-            # Read message
-            data = conn.recv(4096).decode('utf-8')
+            # Read message; stays as bytes - parsing runs on bytes and
+            # nothing needs the full frame decoded
+            data = await reader.read(4096)
             if not data:
                 break
             
-            print(f"📨 Received: {len(data)} bytes")
+            logger.debug("📨 Received: %d bytes", len(data))
             
             # Update last activity
             ACTIVE_SESSIONS[session_id]['last_activity'] = time.time()
             
-            # ✅ Check simulation mode
+            # ✅ Check simulation mode; asyncio.sleep keeps other sessions
+            # running while this one stalls
             if mock_state['simulation_mode'] == 'timeout':
-                print("⏱️  SIMULATING TIMEOUT - no response")
-                time.sleep(2)
+                logger.info("⏱️  SIMULATING TIMEOUT - no response")
+                await asyncio.sleep(2)
                 continue
             
-            # ✅ Add latency if configured
+            # ✅ Add latency if configured. Applied once per read batch,
+            # not per message: N pipelined frames share one delay, like a
+            # real network round-trip, and the non-blocking sleep leaves
+            # every other session running
             if mock_state['latency_ms'] > 0:
-                print(f"⏱️  Simulating latency: {mock_state['latency_ms']}ms")
-                time.sleep(mock_state['latency_ms'] / 1000.0)
-            
-            # Parse message type
-            msg_type = detect_message_type(data)
-            
-            # ✅ Handle LOGIN
-            if 'LOGIN' in data or msg_type == 'LOGIN':
-                response = handle_login(session_id, data)
-                conn.sendall(response.encode('utf-8'))
-                print(f"✅ LOGIN processed for {session_id}")
-                continue
-            
-            # ✅ Validate session
-            if not ACTIVE_SESSIONS[session_id]['authenticated']:
-                response = generate_error("SESSION_NOT_ACTIVE", "Session not authenticated")
-                conn.sendall(response.encode('utf-8'))
-                print(f"❌ Rejected: session not authenticated")
-                continue
-            
-            # ✅ Validate sequence number
-            seq_num = extract_sequence_number(data)
-            expected_seq = ACTIVE_SESSIONS[session_id]['incoming_sequence'] + 1
-            
-            if seq_num != expected_seq:
-                print(f"⚠️  Sequence mismatch: expected {expected_seq}, got {seq_num}")
-                response = generate_resend_request(expected_seq, seq_num - 1)
-                conn.sendall(response.encode('utf-8'))
-                continue
-            
-            # Update sequence
-            ACTIVE_SESSIONS[session_id]['incoming_sequence'] = seq_num
-            
-            # Extract message ID
-            message_id = extract_message_id(data)
+                logger.debug("⏱️  Simulating latency: %dms", mock_state['latency_ms'])
+                await asyncio.sleep(mock_state['latency_ms'] / 1000.0)
             
-            # Store message
-            mock_state['messages'][message_id] = {
-                'timestamp': datetime.now().isoformat(),
-                'sequenceNumber': seq_num,
-                'status': 'RECEIVED',
-                'responseType': 'ACK',
-                'content': data[:200]  # Store first 200 chars
-            }
-            mock_state['message_count'] += 1
+            buf.extend(data)
             
-            # Generate response based on simulation mode
-            if mock_state['simulation_mode'] == 'nack':
-                response = generate_nack(message_id, seq_num, "T27", "Invalid format (simulated)")
-                mock_state['messages'][message_id]['responseType'] = 'NACK'
-                print(f"❌ Sending NACK for {message_id}")
-            else:
-                response = generate_ack(message_id, seq_num)
-                mock_state['messages'][message_id]['responseType'] = 'ACK'
-                print(f"✅ Sending ACK for {message_id}")
+            # Peel complete frames off the buffer, coalescing all their
+            # responses into a single write
+            out = bytearray()
+            while (end := buf.find(b'-}')) != -1:
+                frame = bytes(buf[:end + 2])
+                del buf[:end + 2]
+                response = process_message(session_id, frame)
+                if response:
+                    out += response
+                if len(out) >= 65536:  # bound the batch buffer
+                    writer.write(bytes(out))
+                    await writer.drain()
+                    out.clear()
             
-            # Send response
-            conn.sendall(response.encode('utf-8'))
+            # LOGIN frames carry no '-}' terminator - handle them as soon
+            # as they arrive instead of waiting for bytes that never come
+            if b'LOGIN' in buf:
+                response = process_message(session_id, bytes(buf))
+                buf.clear()
+                if response:
+                    out += response
             
-            ACTIVE_SESSIONS[session_id]['outgoing_sequence'] += 1
-            
-            # Save state periodically
-            if mock_state['message_count'] % 10 == 0:
-                save_state()
+            if out:
+                writer.write(bytes(out))
+                await writer.drain()
     
     except Exception as e:
-        print(f"❌ Error handling client: {e}")
+        logger.error("❌ Error handling client: %s", e)
     
     finally:
         # ✅ Cleanup session
@@ -270,112 +403,179 @@ def handle_client(conn, addr):
             del ACTIVE_SESSIONS[session_id]
         if session_id in mock_state['sessions']:
             del mock_state['sessions'][session_id]
+            _counters.sessions -= 1
         
-        conn.close()
-        print(f"🔌 Connection closed: {addr}")
+        writer.close()
+        logger.info("🔌 Connection closed: %s", addr)
+
+
+def process_message(session_id, data):
+    """Handle one logical SWIFT message; returns the response bytes or None"""
+    # One scan serves type detection, message id and sequence number
+    info = scan_message(data)
+    
+    # ✅ Handle LOGIN
+    if info.msg_type == 'LOGIN':
+        response = handle_login(session_id, data)
+        logger.info("✅ LOGIN processed for %s", session_id)
+        return response
+    
+    # ✅ Validate session
+    if not ACTIVE_SESSIONS[session_id]['authenticated']:
+        logger.info("❌ Rejected: session not authenticated")
+        return generate_error("SESSION_NOT_ACTIVE", "Session not authenticated")
+    
+    # ✅ Validate sequence number
+    seq_num = info.seq_num
+    expected_seq = ACTIVE_SESSIONS[session_id]['incoming_sequence'] + 1
+    
+    if seq_num != expected_seq:
+        logger.info("⚠️  Sequence mismatch: expected %d, got %d", expected_seq, seq_num)
+        return generate_resend_request(expected_seq, seq_num - 1)
+    
+    # Update sequence
+    ACTIVE_SESSIONS[session_id]['incoming_sequence'] = seq_num
+    
+    # Extract message ID
+    message_id = info.msg_id
+    
+    # Store message
+    if message_id not in mock_state['messages']:
+        _counters.messages += 1
+    preview = data[:200]
+    content_off = _content_log.tell()
+    _content_log.write(preview)
+    mock_state['messages'][message_id] = {
+        # Raw clock reading; ISO formatting happens on query, not per store
+        'timestamp_ns': time.time_ns(),
+        'sequenceNumber': seq_num,
+        'status': 'RECEIVED',
+        'responseType': 'ACK',
+        'content': {'off': content_off, 'len': len(preview)}  # see CONTENT_LOG_FILE
+    }
+    mock_state['message_count'] += 1
+    
+    # Evict the oldest entry once the cap is hit so soak tests cannot
+    # grow memory (and state dumps) without bound
+    if len(mock_state['messages']) > MESSAGE_CAP:
+        mock_state['messages'].popitem(last=False)
+        _counters.messages -= 1
+    
+    # Generate response based on simulation mode
+    if mock_state['simulation_mode'] == 'nack':
+        response = generate_nack(message_id, seq_num, "T27", "Invalid format (simulated)")
+        mock_state['messages'][message_id]['responseType'] = 'NACK'
+        logger.debug("❌ Sending NACK for %s", message_id)
+    else:
+        response = generate_ack(message_id, seq_num)
+        mock_state['messages'][message_id]['responseType'] = 'ACK'
+        logger.debug("✅ Sending ACK for %s", message_id)
+    
+    ACTIVE_SESSIONS[session_id]['outgoing_sequence'] += 1
+    
+    # Journal the record; full save_state only runs at shutdown/reset
+    _log_q.put_nowait((message_id, mock_state['messages'][message_id]))
+    
+    return response
+
 
 def handle_login(session_id, data):
     """Handle LOGIN request"""
     ACTIVE_SESSIONS[session_id]['authenticated'] = True
     
-    response = f"""{{1:F01MOCKSVRXXXXAXXX0000000000}}{{2:I001MOCKRCVRXXXXN}}{{4:
-:20:LOGIN-ACK
-:108:SESSION-{session_id}
-:79:Login successful
--}}"""
+    return _LOGIN_ACK_TMPL % session_id.encode('ascii')
+
+def scan_message(data):
+    """Single pass over a frame: message type, Tag 20 and Tag 34 together"""
+    msg_id_b = None
+    seq_num = None
+    has_login = False
+    has_mt103 = False
+    
+    for match in _TAGS_RE.finditer(data):
+        group = match.lastindex
+        if group == 1:
+            if msg_id_b is None:
+                msg_id_b = match.group(1)
+        elif group == 2:
+            if seq_num is None:
+                seq_num = int(match.group(2))
+        elif group == 3:
+            has_login = True
+        else:  # MT103 marker or :32A:
+            has_mt103 = True
     
-    return response
+    if has_login:
+        msg_type = 'LOGIN'
+    elif msg_id_b is not None and msg_id_b.startswith((b'HEARTBEAT', b'ECHO')):
+        msg_type = 'HEARTBEAT'
+    elif has_mt103:
+        msg_type = 'MT103'
+    else:
+        msg_type = 'UNKNOWN'
+    
+    if msg_id_b is not None:
+        msg_id = msg_id_b.strip().decode('ascii', errors='replace')
+    else:
+        msg_id = f"MSG-{int(time.time())}"
+    
+    return _ScanResult(msg_type, msg_id, seq_num if seq_num is not None else 1)
 
 def detect_message_type(data):
-    """Detect SWIFT message type"""
-    if 'LOGIN' in data:
-        return 'LOGIN'
-    elif ':20:HEARTBEAT' in data or ':20:ECHO' in data:
-        return 'HEARTBEAT'
-    elif 'MT103' in data or ':32A:' in data:
-        return 'MT103'
-    else:
-        return 'UNKNOWN'
+    """Detect SWIFT message type (thin wrapper over scan_message)"""
+    return scan_message(data).msg_type
 
 def extract_sequence_number(data):
     """Extract sequence number from message"""
-    match = re.search(r':34:(\d+)', data)
-    if match:
-        return int(match.group(1))
-    return 1  # Default
+    return scan_message(data).seq_num
 
 def extract_message_id(data):
     """Extract message ID (Tag 20)"""
-    match = re.search(r':20:([^\n]+)', data)
-    if match:
-        return match.group(1).strip()
-    return f"MSG-{int(time.time())}"
+    return scan_message(data).msg_id
 
 def generate_ack(message_id, seq_num):
     """Generate ACK (F21)"""
-    return f"""{{1:F21MOCKSVRXXXXAXXX0000000000}}{{2:I901MOCKRCVRXXXXN}}{{4:
-:20:{message_id}
-:34:{seq_num}
-:77E:ACK
-:108:DEMO-UETR-{message_id}
-:177:{datetime.now().strftime('%y%m%d%H%M')}
-:451:0
--}}
-{{5:{{MAC:TESTMAC}}{{CHK:TESTCHK}}}}
-"""
+    mid = message_id.encode('utf-8')
+    s0, s1, s2, s3, s4 = _ACK_SEGS
+    return b"".join((s0, mid, s1, b"%d" % seq_num, s2, mid, s3, _ts_minute(), s4))
 
 def generate_nack(message_id, seq_num, error_code, error_text):
     """Generate NACK (F21 with error)"""
-    return f"""{{1:F21MOCKSVRXXXXAXXX0000000000}}{{2:I901MOCKRCVRXXXXN}}{{4:
-:20:{message_id}
-:34:{seq_num}
-:77E:NACK
-:451:{error_code}
-:79:{error_text}
--}}
-{{5:{{MAC:TESTMAC}}{{CHK:TESTCHK}}}}
-"""
+    s0, s1, s2, s3, s4 = _NACK_SEGS
+    return b"".join((s0, message_id.encode('utf-8'), s1, b"%d" % seq_num,
+                     s2, error_code.encode('ascii'), s3,
+                     error_text.encode('utf-8'), s4))
 
 def generate_resend_request(begin_seq, end_seq):
     """Generate Resend Request (MsgType 2)"""
-    return f"""{{1:F02MOCKSVRXXXXAXXX0000000000}}{{2:I2MOCKRCVRXXXXN}}{{4:
-:7:1
-:16:{begin_seq}
-:17:{end_seq}
--}}
-{{5:{{MAC:TESTMAC}}{{CHK:TESTCHK}}}}
-"""
+    return _RESEND_TMPL % (begin_seq, end_seq)
 
 def generate_error(error_code, error_text):
     """Generate error message"""
-    return f"""{{1:F21MOCKSVRXXXXAXXX0000000000}}{{2:I901MOCKRCVRXXXXN}}{{4:
-:20:ERROR
-:451:{error_code}
-:79:{error_text}
--}}
-"""
+    return _ERROR_TMPL % (error_code.encode('ascii'), error_text.encode('utf-8'))
+
+async def _serve_tcp():
+    """Run the asyncio server; one loop multiplexes every SWIFT session"""
+    # Full backlog so bursts of short-lived test connections don't get
+    # refused while the loop is busy
+    server = await asyncio.start_server(handle_client, TCP_HOST, TCP_PORT,
+                                        backlog=socket.SOMAXCONN)
+    print(f"✅ SWIFT server listening on port {TCP_PORT}")
+    async with server:
+        await server.serve_forever()
+
 
 def start_tcp_server():
     """Start TCP server for SWIFT messages"""
     print(f"🚀 Starting SWIFT TCP server on {TCP_HOST}:{TCP_PORT}")
-    
-    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server.bind((TCP_HOST, TCP_PORT))
-    server.listen(5)
-    
-    print(f"✅ SWIFT server listening on port {TCP_PORT}")
-    
-    while True:
-        conn, addr = server.accept()
-        thread = threading.Thread(target=handle_client, args=(conn, addr))
-        thread.daemon = True
-        thread.start()
+    asyncio.run(_serve_tcp())
 
 def start_api_server():
     """Start REST API server for control"""
     print(f"🚀 Starting Control API on port {API_PORT}")
-    app.run(host='0.0.0.0', port=API_PORT, debug=False)
+    # uvicorn's asyncio loop handles each request without a thread per
+    # connection; signal handlers are skipped off the main thread
+    uvicorn.run(app, host='0.0.0.0', port=API_PORT, log_level='warning')
 
 if __name__ == '__main__':
     print("=" * 80)
@@ -388,6 +588,9 @@ if __name__ == '__main__':
     # Load previous state
     load_state()
     
+    # One full snapshot on the way out covers whatever the journal missed
+    atexit.register(save_state)
+    
     # Start API server in separate thread
     api_thread = threading.Thread(target=start_api_server)
     api_thread.daemon = True
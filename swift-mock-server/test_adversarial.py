@@ -7,6 +7,7 @@ Demonstrates adversarial testing scenarios
 import socket
 import time
 import hashlib
+import re
 import requests
 import json
 
@@ -14,50 +15,70 @@ HOST = 'localhost'
 PORT = 10103
 CONTROL_API = 'http://localhost:8888'
 
+# One pooled session for every control-API call: connections are reused
+# across the whole run instead of a fresh TCP+HTTP handshake per call
+SESSION = requests.Session()
+SESSION.headers['Connection'] = 'keep-alive'
+SESSION.mount('http://', requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4))
 
-def calculate_swift_checksum(message: str) -> str:
-    """Must match server implementation"""
-    import re
-    message_without_trailer = re.sub(r'\{5:.*?\}\}$', '', message, flags=re.DOTALL)
-    checksum = hashlib.sha256(message_without_trailer.encode('utf-8')).hexdigest()[:12]
-    return checksum.upper()
+# Compiled once; operates on bytes so no per-call pattern lookup or
+# encode round-trip. SHA-256 is kept (not swapped for BLAKE2) because
+# these values must stay bit-identical to the server's trailer algorithm.
+_TRAILER_STRIP_RE = re.compile(rb'\{5:.*?\}\}$', re.DOTALL)
+_MAC_KEY = b"MOCK_SECRET_KEY"
 
 
-def calculate_mac(message: str, key: str = "MOCK_SECRET_KEY") -> str:
+def calculate_swift_checksum(message: bytes) -> str:
     """Must match server implementation"""
-    hmac = hashlib.sha256(f"{message}{key}".encode('utf-8')).hexdigest()[:16]
-    return hmac.upper()
+    return hashlib.sha256(_TRAILER_STRIP_RE.sub(b'', message)).hexdigest()[:12].upper()
 
 
-def build_mt103(trn: str, seq_num: int, amount: str = "10000,00") -> str:
+def calculate_mac(message: bytes, key: bytes = _MAC_KEY) -> str:
+    """Must match server implementation"""
+    # Stream the key into the hasher instead of building message+key
+    h = hashlib.sha256(message)
+    h.update(key)
+    return h.hexdigest()[:16].upper()
+
+
+# Constant message shape, encoded once; build_mt103 only substitutes the
+# reference, sequence and amount
+_MT103_TMPL = (b"{1:F01TESTUS33XXXX0000000000}"
+               b"{2:O1031234240107TESTDE33XXXX12345678}"
+               b"{3:{108:DEMO-UETR-%b}}"
+               b"{4:\n"
+               b":20:%b\n"
+               b":34:%d\n"
+               b":32A:240107USD%b\n"
+               b":50K:Test Ordering Customer\nACME Corp\n"
+               b":59:Test Beneficiary\nXYZ Bank\n"
+               b"-}\n")
+
+
+def build_mt103(trn: str, seq_num: int, amount: str = "10000,00") -> bytes:
     """Build complete MT103 with all 5 blocks"""
-    message = (
-        f"{{1:F01TESTUS33XXXX0000000000}}"
-        f"{{2:O1031234240107TESTDE33XXXX12345678}}"
-        f"{{3:{{108:DEMO-UETR-{trn}}}}}"
-        f"{{4:\n"
-        f":20:{trn}\n"
-        f":34:{seq_num}\n"
-        f":32A:240107USD{amount}\n"
-        f":50K:Test Ordering Customer\nACME Corp\n"
-        f":59:Test Beneficiary\nXYZ Bank\n"
-        f"-}}\n"
-    )
+    trn_b = trn.encode('ascii')
+    body = _MT103_TMPL % (trn_b, trn_b, seq_num, amount.encode('ascii'))
     
-    # Calculate Block 5
-    checksum = calculate_swift_checksum(message)
-    mac = calculate_mac(message)
-    message += f"{{5:{{MAC:{mac}}}{{CHK:{checksum}}}}}"
+    # One hash pass covers both digests: CHK from the body state, MAC by
+    # chaining the key onto the same state (identical to calling the two
+    # calculate_* helpers separately)
+    h = hashlib.sha256(body)
+    checksum = h.hexdigest()[:12].upper()
+    h.update(_MAC_KEY)
+    mac = h.hexdigest()[:16].upper()
     
-    return message
+    return b"%b{5:{MAC:%b}{CHK:%b}}" % (body, mac.encode('ascii'), checksum.encode('ascii'))
 
 
-def send_message(message: str) -> str:
-    """Send message and receive response"""
+def send_message(message) -> str:
+    """Send message (bytes or str) and receive response"""
+    if isinstance(message, str):
+        message = message.encode('utf-8')
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.settimeout(10)
         s.connect((HOST, PORT))
-        s.sendall(message.encode('utf-8'))
+        s.sendall(message)
         
         response = s.recv(8192).decode('utf-8')
         return response
@@ -66,7 +87,7 @@ def send_message(message: str) -> str:
 def check_server_status():
     """Check mock server status via Control API"""
     try:
-        response = requests.get(f'{CONTROL_API}/status')
+        response = SESSION.get(f'{CONTROL_API}/status')
         return response.json()
     except Exception as e:
         print(f"❌ Control API not available: {e}")
@@ -77,17 +98,31 @@ def inject_error(error_type: str, **kwargs):
     """Inject error via Control API"""
     try:
         payload = {'error_type': error_type, **kwargs}
-        response = requests.post(f'{CONTROL_API}/inject-error', json=payload)
+        response = SESSION.post(f'{CONTROL_API}/inject-error', json=payload)
         return response.json()
     except Exception as e:
         print(f"❌ Failed to inject error: {e}")
         return None
 
 
+def _wait_status(predicate, deadline: float = 1.0) -> bool:
+    """Poll /status until predicate(status) holds; replaces blind sleeps"""
+    t0 = time.monotonic()
+    while time.monotonic() - t0 < deadline:
+        try:
+            status = SESSION.get(f'{CONTROL_API}/status').json()
+        except Exception:
+            status = None
+        if status and predicate(status):
+            return True
+        time.sleep(0.005)
+    return False
+
+
 def reset_server():
     """Reset server state"""
     try:
-        response = requests.post(f'{CONTROL_API}/reset')
+        response = SESSION.post(f'{CONTROL_API}/reset')
         return response.json()
     except Exception as e:
         print(f"❌ Failed to reset server: {e}")
@@ -128,7 +163,7 @@ def test_2_nack_injection():
     result = inject_error('nack_next')
     print(f"Injection result: {result}")
     
-    time.sleep(0.5)
+    _wait_status(lambda s: s.get('error_mode') == 'nack_next')
     
     message = build_mt103("TEST-002", 2)
     print(f"Sending message: TEST-002 (seq: 2)")
@@ -218,7 +253,7 @@ def test_5_ignored_sequence():
     result = inject_error('ignore_sequence', sequences=[30])
     print(f"Injection result: {result}")
     
-    time.sleep(0.5)
+    _wait_status(lambda s: 30 in s.get('ignored_sequences', []))
     
     message = build_mt103("TEST-030", 30)
     print(f"Sending sequence 30 (will be ignored)...")
@@ -227,7 +262,7 @@ def test_5_ignored_sequence():
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.settimeout(3)  # Short timeout
             s.connect((HOST, PORT))
-            s.sendall(message.encode('utf-8'))
+            s.sendall(message)
             
             response = s.recv(8192).decode('utf-8')
             print("❌ Received response when server should have ignored!")
@@ -250,7 +285,7 @@ def test_6_connection_drop():
     result = inject_error('drop_connection')
     print(f"Injection result: {result}")
     
-    time.sleep(0.5)
+    _wait_status(lambda s: s.get('error_mode') == 'drop_connection')
     
     message = build_mt103("TEST-DROP", 40)
     print(f"Sending message (connection will drop)...")
@@ -259,7 +294,7 @@ def test_6_connection_drop():
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
             s.settimeout(5)
             s.connect((HOST, PORT))
-            s.sendall(message.encode('utf-8'))
+            s.sendall(message)
             
             response = s.recv(8192).decode('utf-8')
             if not response:
@@ -321,7 +356,7 @@ def run_all_tests():
     print("\nResetting server state...")
     reset_server()
     
-    time.sleep(1)
+    _wait_status(lambda s: s.get('message_count') == 0)
     
     # Run tests
     tests = [
@@ -339,7 +374,6 @@ def run_all_tests():
         try:
             result = test_func()
             results.append((test_func.__name__, result))
-            time.sleep(1)  # Pause between tests
         except Exception as e:
             print(f"❌ Test failed with exception: {e}")
             import traceback